@@ -1,123 +1,304 @@
+import io
 import os
 import re
+import json
 import sqlite3
+import tempfile
 import smtplib
-import requests
-import fitz  # PyMuPDF
-from bs4 import BeautifulSoup
+import asyncio
+import atexit
+import threading
+import httpx
+from selectolax.lexbor import LexborHTMLParser
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from collections import Counter
+from contextlib import contextmanager
+from math import sqrt
 
 # ------------------------------------------------------------
 # CONFIG
 # ------------------------------------------------------------
 DB_PATH = "/tmp/jobs_seen.db"
+RESUME_CACHE_PATH = "/tmp/resume_cache.json"
 MIN_SALARY = 20000
 MAX_RESULTS = 15  # top jobs in summary email
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+}
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
 
 # ------------------------------------------------------------
 # STEP 1 — Read and analyze resume.pdf
 # ------------------------------------------------------------
 def extract_resume_text(pdf_path="resume.pdf"):
-    text = ""
     if not os.path.exists(pdf_path):
         print("⚠️ resume.pdf not found, using default keywords.")
         return "Frontend Developer HTML CSS JavaScript React UI UX Design Mathematics"
+    import fitz  # PyMuPDF, only needed on a resume cache miss
     with fitz.open(pdf_path) as doc:
-        for page in doc:
-            text += page.get_text()
-    return text
+        return "\n".join(page.get_text() for page in doc)
+
+TECH_TERMS = (
+    "html css javascript react angular vue bootstrap python java ui ux design frontend "
+    "developer web figma wordpress ai chatbot mathematics data entry"
+).split()
+
+# All tech terms in one case-insensitive pass, matched as whole letter runs
+KW_RE = re.compile(
+    r"(?<![A-Za-z])(?:"
+    + "|".join(re.escape(t) for t in sorted(TECH_TERMS, key=len, reverse=True))
+    + r")(?![A-Za-z])",
+    re.IGNORECASE,
+)
 
 def extract_keywords(text):
-    words = re.findall(r"[A-Za-z]{3,}", text)
-    common = Counter(w.lower() for w in words)
-    tech_terms = [
-        w for w in common
-        if w.lower() in (
-            "html css javascript react angular vue bootstrap python java ui ux design frontend "
-            "developer web figma wordpress ai chatbot mathematics data entry"
-        )
-    ]
+    # dict.fromkeys keeps first-occurrence order, which drives the search query
+    tech_terms = list(dict.fromkeys(m.lower() for m in KW_RE.findall(text)))
     if not tech_terms:
         tech_terms = ["frontend", "developer", "web", "design"]
     print("Extracted keywords:", ", ".join(tech_terms))
     return tech_terms
 
-RESUME_TEXT = extract_resume_text()
-KEYWORDS = extract_keywords(RESUME_TEXT)
+# Common English stop words (3+ letters, matching tokenize()), standing in for
+# the stop_words="english" filtering the old TfidfVectorizer ranking applied
+STOP_WORDS = frozenset("""
+    about above after again against all also among and any are around because
+    been before being below between both but can could did does doing down
+    during each etc few for from further had has have having her here hers
+    herself him himself his how into its itself just may might more most must
+    myself nor not now off once only other our ours ourselves out over own per
+    same she should since some such than that the their theirs them themselves
+    then there these they this those through too under until upon very via was
+    were what when where which while who whom whose why will with within
+    without would yet you your yours yourself yourselves
+""".split())
+
+def tokenize(text):
+    return Counter(t for t in re.findall(r"[a-z]{3,}", text.lower())
+                   if t not in STOP_WORDS)
+
+def load_resume(pdf_path="resume.pdf"):
+    # Reuse the last PDF extraction while resume.pdf is unchanged (same
+    # mtime/size). Only the text is cached: keywords are cheap to recompute and
+    # must follow TECH_TERMS/extract_keywords, not the PDF.
+    try:
+        st = os.stat(pdf_path)
+    except FileNotFoundError:
+        st = None
+    text = None
+    if st is not None:
+        # JSON, not pickle: the cache sits in a shared directory and must
+        # never be able to run code. Anything malformed is just a miss.
+        try:
+            with open(RESUME_CACHE_PATH, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if (isinstance(entry, list) and len(entry) == 3
+                and isinstance(entry[2], str)
+                and entry[:2] == [st.st_mtime, st.st_size]):
+            text = entry[2]
+    if text is None:
+        text = extract_resume_text(pdf_path)
+        if st is not None:
+            _write_resume_cache([st.st_mtime, st.st_size, text])
+    return text, extract_keywords(text)
+
+def _write_resume_cache(entry):
+    # Best effort: write to a temp file and swap it in, so a failed or
+    # concurrent write never leaves a torn cache and never aborts the run.
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(RESUME_CACHE_PATH) or ".")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, RESUME_CACHE_PATH)
+    except OSError as e:
+        print("⚠️ Could not write resume cache:", e)
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+RESUME_TEXT, KEYWORDS = load_resume()
+RESUME_TOKENS = tokenize(RESUME_TEXT)
 
 # ------------------------------------------------------------
 # STEP 2 — SQLite database to avoid duplicates
 # ------------------------------------------------------------
+# One autocommit connection for the whole process, shared across threads and
+# guarded by _DB_LOCK. The DB is a disposable "seen" cache, so trade strict
+# durability for fewer fsyncs per commit.
+CONN = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+CONN.execute("PRAGMA journal_mode=WAL")
+CONN.execute("PRAGMA synchronous=NORMAL")
+CONN.execute("PRAGMA temp_store=MEMORY")
+_DB_LOCK = threading.Lock()
+atexit.register(CONN.close)
+
+@contextmanager
+def _transaction():
+    # Explicit BEGIN/COMMIT on the autocommit CONN; roll back on any error so a
+    # failed write never leaves the shared connection inside a transaction.
+    with _DB_LOCK:
+        CONN.execute("BEGIN")
+        try:
+            yield CONN
+            CONN.execute("COMMIT")
+        except BaseException:
+            CONN.execute("ROLLBACK")
+            raise
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY)")
-    conn.close()
-
-def is_new_job(job_id):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM jobs WHERE id=?", (job_id,))
-    exists = cur.fetchone()
-    if not exists:
-        cur.execute("INSERT INTO jobs (id) VALUES (?)", (job_id,))
-    conn.commit()
-    conn.close()
-    return not exists
+    with _DB_LOCK:
+        # id is the PRIMARY KEY, so the IN (...) dedup lookup needs no extra index
+        CONN.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY)")
+        CONN.execute("CREATE TABLE IF NOT EXISTS http_cache "
+                     "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)")
+
+def conditional_headers(urls):
+    # {url: headers} with the validators from each URL's last 200, so
+    # unchanged pages come back 304. Read once, before any fetch starts.
+    urls = list(urls)
+    placeholders = ",".join("?" * len(urls))
+    with _DB_LOCK:
+        rows = CONN.execute("SELECT url, etag, last_modified FROM http_cache "
+                            f"WHERE url IN ({placeholders})", urls).fetchall()
+    result = {url: {} for url in urls}
+    for url, etag, last_modified in rows:
+        if etag:
+            result[url]["If-None-Match"] = etag
+        if last_modified:
+            result[url]["If-Modified-Since"] = last_modified
+    return result
+
+SQLITE_MAX_VARS = 999  # bound parameters per statement on older SQLite builds
+
+def filter_new_jobs(jobs):
+    # Collapse duplicates across sources first (first occurrence wins)
+    candidates = {}
+    for j in jobs:
+        candidates.setdefault(j["id"], j)
+    if not candidates:
+        return []
+    ids = list(candidates)
+    with _DB_LOCK:
+        for i in range(0, len(ids), SQLITE_MAX_VARS):
+            chunk = ids[i:i + SQLITE_MAX_VARS]
+            placeholders = ",".join("?" * len(chunk))
+            rows = CONN.execute(f"SELECT id FROM jobs WHERE id IN ({placeholders})", chunk)
+            for (job_id,) in rows:
+                del candidates[job_id]
+    return list(candidates.values())
+
+def mark_jobs_seen(jobs, validators=()):
+    # Jobs and the listing validators that produced them go in one
+    # transaction: a page is only cached as "unchanged" once its jobs are
+    # recorded, so a later 304 can never hide unrecorded jobs.
+    if not jobs and not validators:
+        return
+    with _transaction() as conn:
+        conn.executemany("INSERT OR IGNORE INTO jobs (id) VALUES (?)",
+                         [(j["id"],) for j in jobs])
+        for url, etag, last_modified in validators:
+            if etag or last_modified:
+                conn.execute("INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?)",
+                             (url, etag, last_modified))
+            else:
+                # No validators on this 200: drop the stale row
+                conn.execute("DELETE FROM http_cache WHERE url=?", (url,))
 
 # ------------------------------------------------------------
 # STEP 3 — Fetch jobs from sources
 # ------------------------------------------------------------
-def fetch_internshala_jobs():
-    query = "-".join(KEYWORDS[:2])
-    url = f"https://internshala.com/internships/work-from-home-{query}-internship"
-    html = requests.get(url, timeout=20).text
-    soup = BeautifulSoup(html, "html.parser")
-    jobs = []
-    for c in soup.select("div.individual_internship"):
-        title = c.find("h3", class_="heading_4_5").text.strip()
-        company = c.find("p", class_="company_name").text.strip()
-        link = "https://internshala.com" + c.find("a")["href"]
-        stipend_tag = c.find("span", string=re.compile("₹"))
-        stipend_text = stipend_tag.text.strip() if stipend_tag else "N/A"
-        amt = re.findall(r"\d+", stipend_text.replace(",", ""))
-        salary = int(amt[0]) if amt else 0
-        if salary >= MIN_SALARY:
-            jobs.append({"id": link, "title": title, "company": company,
-                         "salary": salary, "url": link})
-    return jobs
+_RE_AMOUNT = re.compile(r"\d[\d,]*")
+
+def extract_salary_in_inr(text):
+    # First amount in the text, e.g. "₹ 10,000-15,000 /month" -> 10000
+    m = _RE_AMOUNT.search(text)
+    return int(m.group().replace(",", "")) if m else 0
+
+# Per-site scrape config, resolved once at import. "link": None means the
+# card element itself carries the href; "salary": None means no stipend gate.
+SITES = [
+    {
+        "name": "Internshala",
+        "url": "https://internshala.com/internships/work-from-home-"
+               f"{'-'.join(KEYWORDS[:2])}-internship",
+        "base": "https://internshala.com",
+        "card": "div.individual_internship",
+        "limit": None,
+        "title": "h3.heading_4_5",
+        "company": "p.company_name",
+        "link": "a",
+        "salary": 'span:lexbor-contains("₹")',
+    },
+    {
+        "name": "Indeed",
+        "url": f"https://www.indeed.com/jobs?q={'+'.join(KEYWORDS[:3])}+fresher&l=remote",
+        "base": "https://www.indeed.com",
+        "card": "a.tapItem",
+        "limit": 20,
+        "title": "h2",
+        "company": "span.companyName",
+        "link": None,
+        "salary": None,
+    },
+]
 
-def fetch_indeed_jobs():
-    query = "+".join(KEYWORDS[:3])
-    url = f"https://www.indeed.com/jobs?q={query}+fresher&l=remote"
-    html = requests.get(url, timeout=20).text
-    soup = BeautifulSoup(html, "html.parser")
+def _text(node, selector, default="N/A"):
+    found = node.css_first(selector)
+    return found.text(strip=True) if found else default
+
+async def scrape(client, site, headers):
+    # Returns (jobs, validators); validators is (url, etag, last_modified) for
+    # a 200 response, to be persisted by run() along with the jobs, else None.
+    # headers carries the conditional request headers run() read from the DB.
+    resp = await client.get(site["url"], headers=headers, timeout=20)
+    if resp.status_code == 304:
+        print(f"{site['name']}: listing unchanged since last run, skipping")
+        return [], None
+    # Anything but a 2xx (after redirects) surfaces via run()'s error path
+    resp.raise_for_status()
+    validators = None
+    if resp.status_code == 200:
+        validators = (site["url"], resp.headers.get("ETag"),
+                      resp.headers.get("Last-Modified"))
+    tree = LexborHTMLParser(resp.content)
     jobs = []
-    for c in soup.select("a.tapItem")[:20]:
-        title = c.find("h2").text.strip()
-        company = c.find("span", class_="companyName")
-        comp = company.text.strip() if company else "N/A"
-        link = "https://www.indeed.com" + c["href"]
-        jobs.append({"id": link, "title": title, "company": comp,
-                     "salary": 0, "url": link})
-    return jobs
+    for c in tree.css(site["card"])[:site["limit"]]:
+        # Cheapest reject first: most stipend-gated cards fail MIN_SALARY, so
+        # check that before extracting any other field.
+        salary = 0
+        if site["salary"]:
+            salary = extract_salary_in_inr(_text(c, site["salary"]))
+            if salary < MIN_SALARY:
+                continue
+        link_node = c.css_first(site["link"]) if site["link"] else c
+        href = link_node.attributes.get("href") if link_node else None
+        if not href:
+            continue
+        title = _text(c, site["title"], None)
+        if not title:
+            continue
+        link = site["base"] + href
+        jobs.append({"id": link, "title": title, "company": _text(c, site["company"]),
+                     "salary": salary, "url": link})
+    return jobs, validators
 
 # ------------------------------------------------------------
 # STEP 4 — Rank by resume similarity
 # ------------------------------------------------------------
-def rank_jobs_by_resume(jobs, resume_text):
+def rank_jobs_by_resume(jobs, resume_tokens):
     if not jobs:
         return []
-    corpus = [resume_text] + [j["title"] + " " + j["company"] for j in jobs]
-    vectorizer = TfidfVectorizer(stop_words="english")
-    tfidf = vectorizer.fit_transform(corpus)
-    scores = cosine_similarity(tfidf[0:1], tfidf[1:]).flatten()
-    for j, s in zip(jobs, scores):
-        j["score"] = round(float(s), 3)
+    resume_norm = sqrt(sum(c * c for c in resume_tokens.values()))
+    for j in jobs:
+        job_tokens = tokenize(j["title"] + " " + j["company"])
+        dot = sum(resume_tokens[t] * c for t, c in job_tokens.items())
+        norm = resume_norm * sqrt(sum(c * c for c in job_tokens.values()))
+        j["score"] = round(dot / norm, 3) if norm else 0.0
     jobs.sort(key=lambda x: x["score"], reverse=True)
     return jobs
 
@@ -138,15 +319,16 @@ def send_email(subject, jobs):
     msg["To"] = recipient
     msg["Subject"] = subject
 
+    buf = io.StringIO()
     if not jobs:
-        html = "<p>No matching jobs found today.</p>"
+        buf.write("<p>No matching jobs found today.</p>")
     else:
-        html = "<h3>Top Matches Based on Your Resume</h3>"
+        buf.write("<h3>Top Matches Based on Your Resume</h3>")
         for i, j in enumerate(jobs[:MAX_RESULTS], 1):
-            html += f"<p><b>{i}. {j['title']}</b> — {j['company']} (Score {j['score']})<br>"
-            html += f"<a href='{j['url']}'>Apply here</a></p>"
+            buf.write(f"<p><b>{i}. {j['title']}</b> — {j['company']} (Score {j['score']})<br>"
+                      f"<a href='{j['url']}'>Apply here</a></p>")
 
-    msg.attach(MIMEText(html, "html"))
+    msg.attach(MIMEText(buf.getvalue(), "html"))
 
     with smtplib.SMTP("smtp.gmail.com", 587) as server:
         server.starttls()
@@ -157,22 +339,36 @@ def send_email(subject, jobs):
 # ------------------------------------------------------------
 # STEP 6 — Main logic
 # ------------------------------------------------------------
-def run():
+async def run():
     init_db()
     print("🔍 Starting daily job search at", datetime.now())
-    all_jobs = []
+    fetched = []
+    validators = []
+    # All http_cache reads happen here and all writes in mark_jobs_seen(), so
+    # the coroutines below never touch sqlite.
+    cond_headers = conditional_headers(site["url"] for site in SITES)
 
-    for fetcher in [fetch_internshala_jobs, fetch_indeed_jobs]:
-        try:
-            jobs = fetcher()
-            for j in jobs:
-                if is_new_job(j["id"]):
-                    all_jobs.append(j)
-        except Exception as e:
-            print("Error fetching jobs:", e)
-
-    ranked = rank_jobs_by_resume(all_jobs, RESUME_TEXT)
+    # Fetch every source concurrently over one HTTP/2 client
+    async with httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, headers=HEADERS,
+                                 follow_redirects=True) as client:
+        results = await asyncio.gather(
+            *(scrape(client, site, cond_headers[site["url"]]) for site in SITES),
+            return_exceptions=True)
+
+    for site, result in zip(SITES, results):
+        if isinstance(result, Exception):
+            print(f"Error fetching jobs ({site['name']}):", result)
+            continue
+        jobs, site_validators = result
+        fetched.extend(jobs)
+        if site_validators:
+            validators.append(site_validators)
+
+    all_jobs = filter_new_jobs(fetched)
+    mark_jobs_seen(all_jobs, validators)
+
+    ranked = rank_jobs_by_resume(all_jobs, RESUME_TOKENS)
     send_email(f"Daily Job Summary — {datetime.utcnow():%Y-%m-%d}", ranked)
 
 if __name__ == "__main__":
-    run()
+    asyncio.run(run())